@@ -0,0 +1,246 @@
+"""This script can broadcast the frames of your game to viewers through telnet"""
+import socket
+import asyncio
+from typing import *
+from recorder import frame_delta, apply_delta
+
+
+"""
+Here is a simple program to indicate how to show your game to viewers.
+
+async def main():
+    server = FrameServer(port=2323)
+    await server.start()
+    while True:
+        server.publish(draw())
+        await asyncio.sleep(1 / 30)
+
+asyncio.run(main())
+
+Then viewers can watch it by `telnet 127.0.0.1 2323`.
+"""
+
+CLEAR = b"\x1b[?25l\x1b[2J\x1b[H"  # Hide cursor, clear screen and move to the top left
+
+
+def encode_frame(lines: List[str]) -> bytes:
+    """Encode the whole frame to ANSI text."""
+    return CLEAR + "\r\n".join(lines).encode("utf-8")
+
+
+def encode_delta(delta: List[Tuple[int, str]]) -> bytes:
+    """Encode the changed rows to ANSI text, each row is moved to and rewritten."""
+    return "".join([f"\x1b[{i+1};1H{line}\x1b[K" for i, line in delta]).encode("utf-8")
+
+
+class _Viewer:
+    """A connected viewer, frames are queued and sent by its own task."""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int) -> None:
+        self.writer = writer
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=queue_size)
+        self.skipped = 0
+
+    def send(self, data: bytes, keyframe: Callable[[], bytes]) -> None:
+        """Queue the data. If the viewer is too slow, skip to the latest frame."""
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(keyframe())
+            self.skipped += 1
+
+    async def run(self) -> None:
+        try:
+            while True:
+                data = await self.queue.get()
+                self.writer.write(data)
+                await self.writer.drain()
+        except (ConnectionError, OSError):
+            self.writer.close()  # The reader of the viewer will get EOF
+
+
+class FrameServer:
+    """
+    # Broadcast frames to viewers
+    This is an asyncio TCP server, viewers can connect to it with telnet or any
+    terminal that supports ANSI escape codes.
+
+    A new viewer will receive the whole frame first, and then only the rows that
+    changed in each frame. The changed rows are encoded once and sent to all of viewers.
+    Each viewer has its own queue. If it is full, which means the viewer cannot keep up,
+    the queue will be cleared and the viewer skips to the latest whole frame, so a slow
+    viewer never makes the game or the other viewers wait.
+
+    All of methods should be called in the thread that runs the event loop. If your game
+    does not run in asyncio, use `publish_threadsafe`.
+    """
+
+    def __init__(self, host: str="127.0.0.1", port: int=2323, queue_size: int=8, backlog: int=1024, send_buffer: int=1 << 16) -> None:
+        """
+        - host, port:
+            Where the server listens. Default is 127.0.0.1:2323
+
+        - queue_size:
+            How many frames can be queued for a viewer before it skips. Default is 8.
+
+        - backlog:
+            How many viewers can wait to be accepted at once. Default is 1024.
+
+        - send_buffer:
+            Bytes buffered for a viewer by the socket and by asyncio. A small buffer makes
+            a slow viewer fill its queue and skip soon, instead of the system buffering
+            megabytes of old frames for it. Default is 64KB.
+        """
+        self.host = host
+        self.port = port
+        self.__queue_size = queue_size
+        self.__backlog = backlog
+        self.__send_buffer = send_buffer
+        self.__server: asyncio.AbstractServer | None = None
+        self.__loop: asyncio.AbstractEventLoop | None = None
+        self.__viewers: Dict[_Viewer, asyncio.Task] = {}
+        self.__lines: List[str] | None = None
+        self.__keyframe: bytes | None = None
+
+    @property
+    def viewers(self) -> int:
+        return len(self.__viewers)
+
+    @property
+    def skipped(self) -> int:
+        """How many times the viewers skipped to the latest frame."""
+        return sum([viewer.skipped for viewer in self.__viewers])
+
+    async def start(self) -> Self:
+        self.__loop = asyncio.get_running_loop()
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port, backlog=self.__backlog)
+        self.port = self.__server.sockets[0].getsockname()[1]  # In case port is 0
+        return self
+
+    async def close(self) -> None:
+        if self.__server is not None:
+            self.__server.close()
+        for viewer, task in list(self.__viewers.items()):
+            task.cancel()
+            viewer.writer.close()
+        if self.__server is not None:
+            await self.__server.wait_closed()
+
+    def __get_keyframe(self) -> bytes:
+        """The whole current frame, it is encoded only when a viewer needs it."""
+        if self.__keyframe is None:
+            self.__keyframe = encode_frame(self.__lines)
+        return self.__keyframe
+
+    def publish(self, lines: List[str]) -> None:
+        """Send a frame to all of viewers."""
+        delta = frame_delta(self.__lines, lines)
+        self.__lines = list(lines)
+        self.__keyframe = None
+        if delta is None:
+            data = self.__get_keyframe()
+        elif delta:
+            data = encode_delta(delta)
+        else:
+            return  # Nothing changed
+        for viewer in self.__viewers:
+            viewer.send(data, self.__get_keyframe)
+
+    def publish_delta(self, delta: List[Tuple[int, str]]) -> None:
+        """Send a frame as changed rows, for example the deltas read by `recorder.read_records`."""
+        if self.__lines is None:
+            raise Exception("There is no frame to apply the delta to, publish a whole frame first.")
+        self.publish(apply_delta(self.__lines, delta))
+
+    def publish_threadsafe(self, lines: List[str]) -> None:
+        """Send a frame from another thread."""
+        self.__loop.call_soon_threadsafe(self.publish, list(lines))
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.__send_buffer)
+        writer.transport.set_write_buffer_limits(high=self.__send_buffer)
+        viewer = _Viewer(writer, self.__queue_size)
+        if self.__lines is not None:
+            viewer.send(self.__get_keyframe(), self.__get_keyframe)
+        task = asyncio.create_task(viewer.run())
+        self.__viewers[viewer] = task
+        try:
+            # Wait until the viewer leaves, anything sent by the viewer is ignored
+            while await reader.read(1 << 16):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.__viewers.pop(viewer, None)
+            task.cancel()
+            writer.close()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    """
+    This is a check of how the server works with a lot of viewers on one core.
+    It connects 1000 local viewers (or the number in the first argument), one of them
+    never reads, publishes 300 frames and makes sure that every viewer connected,
+    the stalled viewer skipped to the latest frame and every viewer left cleanly.
+    """
+    VIEWERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    FRAMES = 300
+
+    async def viewer(port, received):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        count = 0
+        while data := await reader.read(1 << 16):
+            count += len(data)
+        received.append(count)
+        writer.close()
+
+    async def stalled_viewer(port, stop):
+        # A tiny receive buffer, so the kernel cannot hide that it never reads
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(("127.0.0.1", port))
+        sock.setblocking(False)
+        _, writer = await asyncio.open_connection(sock=sock)
+        await stop.wait()
+        writer.close()
+
+    async def main():
+        server = await FrameServer(port=0, queue_size=4).start()
+        lines = ["." * 200 for _ in range(40)]
+        server.publish(lines)
+        received, stop = [], asyncio.Event()
+        tasks = [asyncio.create_task(viewer(server.port, received)) for _ in range(VIEWERS - 1)]
+        tasks.append(asyncio.create_task(stalled_viewer(server.port, stop)))
+        start = time.perf_counter()
+        while server.viewers < VIEWERS:
+            if time.perf_counter() - start > 30:
+                raise Exception(f"Only {server.viewers} of {VIEWERS} viewers connected.")
+            await asyncio.sleep(0.01)
+        print(f"{VIEWERS} viewers connected in {time.perf_counter() - start:.2f}s")
+
+        cost = []
+        for i in range(FRAMES):
+            lines = [f"{i}".ljust(200, "#")] * 40  # Every row changes
+            begin = time.perf_counter()
+            server.publish(lines)
+            cost.append(time.perf_counter() - begin)
+            await asyncio.sleep(1 / 60)
+        skipped = server.skipped
+        print(f"publish: mean {sum(cost) / len(cost) * 1e3:.2f}ms, max {max(cost) * 1e3:.2f}ms, skipped {skipped}")
+
+        stop.set()
+        await server.close()
+        await asyncio.wait_for(asyncio.gather(*tasks), 30)
+        assert skipped > 0, "The stalled viewer should skip to the latest frame."
+        assert len(received) == VIEWERS - 1, "Every viewer should leave cleanly."
+        assert min(received) == max(received), "Every viewer that keeps up should get the same data."
+        print("OK")
+
+    asyncio.run(main())
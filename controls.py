@@ -1,7 +1,10 @@
 """This script can monitor user keyboard input"""
-import msvcrt as mt
 import time
 from threading import Thread
+try:
+    import msvcrt as mt
+except ImportError:
+    mt = None  # msvcrt is only available on Windows, you have to set a backend on other platforms
 
 
 """
@@ -24,8 +27,18 @@ class Keyboard:
 
     """
 
-    def __init__(self) -> None:
+    def __init__(self, backend=None, clock=time.time, recorder=None) -> None:
         """
+        - backend:
+            Where to read the keys from. It should have `kbhit` and `getch` like msvcrt,
+            for example `recorder.ReplayBackend`. Default is None, which means msvcrt.
+
+        - clock:
+            The function to get trigger_time. Default is time.time
+
+        - recorder:
+            A `recorder.Recorder`, every key pressed will be recorded if it is set.
+
         # Example Code
         This is a little script that shows you how to use this class, and how to take actions
         when user press a button on the key board. You can monitor the change of pressing time
@@ -46,6 +59,9 @@ class Keyboard:
         """
         self.__KEY = None
         self.__trigger_time = None
+        self.__backend = mt if backend is None else backend
+        self.__clock = clock
+        self.recorder = recorder
 
     @property
     def KEY(self):
@@ -63,11 +79,25 @@ class Keyboard:
     def trigger_time(self):
         return self.__trigger_time
 
+    def press(self, key: str) -> None:
+        """Set the key that pressed by user, and record it if there is a recorder."""
+        self.__KEY = key
+        self.__trigger_time = self.__clock()
+        if self.recorder is not None:
+            self.recorder.key(key, self.__trigger_time)
+
+    def poll(self) -> bool:
+        """Check the keyboard once without waiting. Return True if a key was pressed."""
+        if self.__backend is None:
+            raise Exception("msvcrt is not available, please set a backend.")
+        if self.__backend.kbhit():
+            self.press(self.__backend.getch().decode("utf-8"))
+            return True
+        return False
+
     def monitor(self) -> None:
         while True:
-            if mt.kbhit():
-                self.__KEY = mt.getch().decode("utf-8")
-                self.__trigger_time = time.time()
+            self.poll()
         
     def start_monitor(self) -> None:
         thread = Thread(target=self.monitor, name="keyboard_monitor", daemon=True)
@@ -0,0 +1,203 @@
+"""This script can adjust the quality of your game to hold a target frame rate"""
+import time
+from collections import deque
+from typing import *
+
+
+"""
+Here is a simple program to indicate how to use the governor.
+
+governor = QualityGovernor(target_fps=30)
+while True:
+    governor.begin()
+    generator.cmdshow()
+    governor.end()
+    if governor.changed:
+        governor.apply(generator)
+    time.sleep(...)  # Sleeping to cap the frame rate should not be measured
+
+`governor.stats` tells you the frame time and every switch the governor made.
+"""
+
+"""
+Quality levels from the best to the worst.
+- resize: Scaling ratio of `Generator.set_quality`, smaller pictures are faster to convert and print.
+- glyphs: How many chars of mapchar are used, None means all of it.
+"""
+LEVELS: List[Dict[str, Any]] = [
+    {"resize": 1.0, "glyphs": None},
+    {"resize": 0.75, "glyphs": None},
+    {"resize": 0.75, "glyphs": 16},
+    {"resize": 0.5, "glyphs": 16},
+    {"resize": 0.5, "glyphs": 8},
+    {"resize": 0.25, "glyphs": 4},
+]
+
+
+class QualityGovernor:
+    """
+    # Hold the frame rate by changing the quality
+    It watches the time of each frame. If the frames are slower than the target
+    for a while, it lowers the quality by one level. If the frames are much faster
+    than the target for a longer while, it raises the quality by one level.
+
+    To avoid switching between two levels again and again:
+    - The frame time is smoothed, a single slow frame does not change anything.
+    - Lowering needs `degrade_after` slow frames, raising needs `upgrade_after` fast frames
+      and the frame time has to be under `headroom` of the budget.
+    - Nothing changes in `cooldown` frames after a switch.
+    - Each time a raised level turns out to be too slow, it waits twice as long before
+      raising to that level again.
+    """
+
+    def __init__(self, target_fps: float=30, levels: List[Dict[str, Any]] | None=None, degrade_after: int=5, upgrade_after: int=60, headroom: float=0.7, cooldown: int=30, smoothing: float=0.2, log_size: int=100) -> None:
+        """
+        - target_fps:
+            The frame rate to hold. Default is 30.
+
+        - levels:
+            Quality levels from the best to the worst, see `LEVELS`. Default is None,
+            which means `LEVELS`.
+
+        - degrade_after, upgrade_after:
+            How many slow frames before lowering and how many fast frames before raising.
+            Default is 5 and 60.
+
+        - headroom:
+            The frame is fast only if its time is under headroom * budget. Default is 0.7
+
+        - cooldown:
+            How many frames to wait after a switch. Default is 30.
+
+        - smoothing:
+            The weight of the newest frame in the smoothed frame time. Default is 0.2
+
+        - log_size:
+            How many switches are kept in the log of `stats`. Default is 100.
+        """
+        if target_fps <= 0:
+            raise ValueError("target_fps should be positive.")
+        self.__levels = LEVELS if levels is None else levels
+        if not self.__levels:
+            raise ValueError("There should be at least one level.")
+        self.__budget = 1 / target_fps
+        self.__degrade_after = degrade_after
+        self.__upgrade_after = upgrade_after
+        self.__headroom = headroom
+        self.__cooldown = cooldown
+        self.__smoothing = smoothing
+        self.__level = 0
+        self.__frame_time = None
+        self.__begin = None
+        self.__slow = 0
+        self.__fast = 0
+        self.__wait = 0
+        self.__failures = [0] * len(self.__levels)
+        self.__upgraded_at = None  # The frame when the level was raised last time
+        self.__frames = 0
+        self.__switches = 0
+        self.__decision = "hold"
+        self.__log = deque(maxlen=log_size)
+        self.changed = False
+
+    @property
+    def level(self) -> int:
+        """The index of the current level, 0 is the best."""
+        return self.__level
+
+    @property
+    def quality(self) -> Dict[str, Any]:
+        return self.__levels[self.__level]
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        The frame stats, the decision of the last frame and the log of the latest switches.
+        frame_ms is the smoothed work time of a frame and work_fps is 1 / that time, so it is
+        how fast the game could run without sleeping, not the frame rate shown on the screen.
+        Each switch in "log" is a dict of frame, from, to, frame_ms (smoothed) and reason.
+        """
+        frame_time = self.__frame_time or 0.0
+        return {
+            "frames": self.__frames,
+            "work_fps": 1 / frame_time if frame_time else 0.0,
+            "frame_ms": frame_time * 1e3,
+            "budget_ms": self.__budget * 1e3,
+            "level": self.__level,
+            "quality": dict(self.quality),
+            "decision": self.__decision,
+            "switches": self.__switches,
+            "log": list(self.__log)
+        }
+
+    def begin(self) -> None:
+        """Call it when the work of a frame begins."""
+        self.__begin = time.perf_counter()
+
+    def end(self) -> Dict[str, Any]:
+        """Call it when the work of a frame ends, before sleeping. The same as `frame`."""
+        if self.__begin is None:
+            raise Exception("begin should be called before end.")
+        frame_time = time.perf_counter() - self.__begin
+        self.__begin = None
+        return self.frame(frame_time)
+
+    def frame(self, frame_time: float) -> Dict[str, Any]:
+        """
+        Call it once a frame. Return the quality to use, `changed` is True if it changed.
+
+        - frame_time:
+            Seconds that the work of the frame took. It should not include the time
+            sleeping to cap the frame rate, otherwise a capped game always looks slow.
+            Use `begin` and `end` to measure it.
+        """
+        self.changed = False
+        self.__decision = "hold"
+        self.__frames += 1
+        if self.__frame_time is None:
+            self.__frame_time = frame_time
+        else:
+            self.__frame_time += self.__smoothing * (frame_time - self.__frame_time)
+
+        if self.__frame_time > self.__budget:
+            self.__slow += 1
+            self.__fast = 0
+        elif self.__frame_time < self.__budget * self.__headroom:
+            self.__fast += 1
+            self.__slow = 0
+        else:
+            self.__slow = self.__fast = 0
+        if self.__wait > 0:
+            self.__wait -= 1
+            return self.quality
+
+        if self.__slow >= self.__degrade_after and self.__level < len(self.__levels) - 1:
+            if self.__upgraded_at is not None and self.__frames - self.__upgraded_at <= self.__upgrade_after:
+                # The level raised recently is too slow, do not try it soon
+                self.__failures[self.__level] += 1
+            self.__upgraded_at = None
+            self.__switch(self.__level + 1, "degrade", f"over the budget for {self.__slow} frames")
+        elif self.__level > 0 and self.__fast >= self.__upgrade_after * 2 ** min(self.__failures[self.__level - 1], 5):
+            self.__switch(self.__level - 1, "upgrade", f"under {self.__headroom:g} of the budget for {self.__fast} frames")
+            self.__upgraded_at = self.__frames
+        return self.quality
+
+    def __switch(self, level: int, decision: str, reason: str) -> None:
+        self.__log.append({
+            "frame": self.__frames,
+            "from": self.__level,
+            "to": level,
+            "frame_ms": self.__frame_time * 1e3,
+            "reason": f"{decision}: {reason}"
+        })
+        self.__level = level
+        self.__decision = decision
+        self.__switches += 1
+        self.__slow = self.__fast = 0
+        self.__wait = self.__cooldown
+        self.changed = True
+
+    def apply(self, *generators) -> None:
+        """Set the current quality to `widget_generator.Generator`s."""
+        for generator in generators:
+            generator.set_quality(**self.quality)
@@ -0,0 +1,244 @@
+"""This script can reload the widgets into your running game when widgets.json changed"""
+import os
+import json
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import hashlib
+import warnings
+import threading
+from typing import *
+
+
+"""
+Here is a simple program to indicate how to reload widgets while developing.
+
+watcher = WidgetWatcher("./").start()
+while True:
+    watcher.apply()  # Between frames
+    draw(watcher.widgets)
+
+Then every change saved by `Editor` or `Generator` will show up in the game.
+"""
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Wait for changes of a file by inotify, only available on Linux."""
+
+    def __init__(self, file: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available.")
+        self.__name = os.path.basename(file).encode()
+        self.__fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.__fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+        # Watch the directory, because the file is replaced when it is saved
+        directory = os.path.dirname(os.path.abspath(file)).encode()
+        if libc.inotify_add_watch(self.__fd, directory, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+            os.close(self.__fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed.")
+
+    def wait(self, timeout: float) -> bool:
+        """Return True if the file changed in timeout seconds."""
+        readable, _, _ = select.select([self.__fd], [], [], timeout)
+        if not readable:
+            return False
+        changed = False
+        try:
+            while True:
+                data = os.read(self.__fd, 1 << 16)
+                offset = 0
+                while offset < len(data):
+                    _, _, _, lenth = _EVENT.unpack_from(data, offset)
+                    offset += _EVENT.size
+                    name = data[offset:offset+lenth].rstrip(b"\0")
+                    offset += lenth
+                    changed = changed or name == self.__name
+        except BlockingIOError:
+            pass
+        return changed
+
+    def close(self) -> None:
+        os.close(self.__fd)
+
+
+class _Polling:
+    """Wait for changes of a file by checking its stat, it works everywhere."""
+
+    def __init__(self, file: str, interval: float) -> None:
+        self.__file = file
+        self.__interval = interval
+        self.__stat = self.__get_stat()
+
+    def __get_stat(self):
+        try:
+            stat = os.stat(self.__file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def wait(self, timeout: float) -> bool:
+        end = time.monotonic() + timeout
+        while True:
+            stat = self.__get_stat()
+            if stat != self.__stat:
+                self.__stat = stat
+                return True
+            if time.monotonic() >= end:
+                return False
+            time.sleep(min(self.__interval, max(end - time.monotonic(), 0)))
+
+    def close(self) -> None:
+        pass
+
+
+class WidgetWatcher:
+    """
+    # Reload widgets while the game is running
+    It watches widgets.json in another thread, by inotify if it is available or
+    by checking the stat of the file. When the file changed, it is loaded again,
+    but only the widgets whose content hash changed are passed to `parse` again.
+
+    The new widgets are prepared in the background, and `apply` swaps them in at once,
+    so call `apply` between frames and a frame never sees half of the changes.
+    """
+
+    def __init__(self, file_path: str | None=None, parse: Callable[[List[str]], Any] | None=None, interval: float=0.1, use_inotify: bool=True) -> None:
+        """
+        - file_path:
+            The directory of widgets.json, the same as `Editor`. Default is None,
+            which means the current directory.
+
+        - parse:
+            Convert the lines of a widget to what your game uses, for example
+            `widget_generator.CharGrid`. Default is None, which means the lines are used.
+
+        - interval:
+            How often to check the file if inotify is not used. Default is 0.1 second.
+
+        - use_inotify:
+            Use inotify if it is available. Default is True.
+        """
+        if file_path is None:
+            file_path = "./"
+        self.__file = os.path.join(file_path, "widgets.json")
+        if not os.path.exists(self.__file):
+            raise Exception("The widgets.json file has not found.")
+        self.__parse = parse
+        self.__interval = interval
+        self.__use_inotify = use_inotify
+        self.__hashes: Dict[str, bytes] = {}
+        self.__widgets: Dict[str, Any] = {}
+        self.__pending: Tuple[Dict[str, Any], Set[str]] | None = None
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__running = False
+        self.changed: Set[str] = set()
+        self.error: Exception | None = None
+        self.backend = None
+        self.reload()
+        self.apply()
+
+    @property
+    def widgets(self) -> Dict[str, Any]:
+        """The widgets that the game should use, it is replaced by `apply`."""
+        return self.__widgets
+
+    @staticmethod
+    def __hash(lines: List[str]) -> bytes:
+        return hashlib.blake2b("\n".join(lines).encode("utf-8"), digest_size=16).digest()
+
+    def reload(self) -> bool:
+        """
+        Load widgets.json and prepare the changed widgets for `apply`.
+        Return False if the file cannot be opened, for example it is being replaced on Windows.
+        A broken widgets.json raises `json.JSONDecodeError`, because saves are atomic
+        and it will not be fixed by reading it again.
+        """
+        try:
+            with open(self.__file, 'r', encoding="utf-8") as file:
+                data: Dict[str, List[str]] = json.load(file)
+        except OSError:
+            return False
+        if not isinstance(data, dict):
+            raise TypeError("widgets.json should be a dict of widgets.")
+        hashes = {name: self.__hash(lines) for name, lines in data.items()}
+        changed = {name for name, digest in hashes.items() if self.__hashes.get(name) != digest}
+        removed = self.__hashes.keys() - hashes.keys()
+        if not changed and not removed:
+            return True
+        parsed = {name: data[name] if self.__parse is None else self.__parse(data[name]) for name in changed}
+        with self.__lock:
+            # Build on the widgets that will be used after the pending changes
+            base = self.__pending[0] if self.__pending is not None else self.__widgets
+            names = self.__pending[1] if self.__pending is not None else set()
+            widgets = {name: widget for name, widget in base.items() if name not in removed}
+            widgets.update(parsed)
+            self.__pending = (widgets, names | changed | removed)
+            self.__hashes = hashes
+        return True
+
+    def apply(self) -> Set[str]:
+        """
+        Swap the reloaded widgets in, it should be called between frames.
+        Return the names of the widgets that changed or removed, they are also kept in `changed`.
+        """
+        with self.__lock:
+            if self.__pending is None:
+                self.changed = set()
+            else:
+                self.__widgets, self.changed = self.__pending
+                self.__pending = None
+        return self.changed
+
+    def watch(self) -> None:
+        if self.__use_inotify:
+            try:
+                self.backend = _Inotify(self.__file)
+            except (OSError, AttributeError, TypeError):
+                self.backend = None
+        if self.backend is None:
+            self.backend = _Polling(self.__file, self.__interval)
+        self.__safe_reload()  # In case it changed before the backend started
+        try:
+            while self.__running:
+                if self.backend.wait(self.__interval):
+                    while not self.__safe_reload() and self.__running:
+                        time.sleep(self.__interval)  # The file cannot be opened, try again later
+        finally:
+            self.backend.close()
+
+    def __safe_reload(self) -> bool:
+        """
+        Reload in the watcher thread. If the widgets cannot be parsed, the error is
+        warned and kept in `error`, the previous widgets are kept and it keeps watching.
+        """
+        try:
+            result = self.reload()
+        except Exception as e:
+            self.error = e
+            warnings.warn(f"Failed to reload {self.__file}, the previous widgets are kept: {e!r}")
+            return True  # Wait for the next change
+        if result:
+            self.error = None
+        return result
+
+    def start(self) -> Self:
+        self.__running = True
+        self.__thread = threading.Thread(target=self.watch, name="widget_watcher", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__running = False
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
@@ -0,0 +1,312 @@
+"""This script can record keyboard input and frames of your game, and replay them"""
+import time
+import zlib
+import struct
+import threading
+from collections import deque
+from typing import *
+from controls import Keyboard
+
+
+"""
+A record file starts with MAGIC and VERSION, the rest of it is a zlib stream of records.
+Each record starts with a type byte and the microseconds passed since the last record.
+
+- KEY:      length(H) + utf-8 key
+- KEYFRAME: rows(H) + each row: length(I) + utf-8 line
+- DELTA:    changed rows(H) + each row: index(H) + length(I) + utf-8 line
+"""
+MAGIC = b"CMDR"
+VERSION = 1
+KEY, KEYFRAME, DELTA = b'K', b'F', b'D'
+_HEAD = struct.Struct("<cI")
+_COUNT = struct.Struct("<H")
+_LINE = struct.Struct("<I")
+_ROW = struct.Struct("<HI")
+
+
+def frame_delta(previous: List[str] | None, lines: List[str]) -> List[Tuple[int, str]] | None:
+    """
+    Get the rows of lines that are different from previous frame, as (index, line).
+    Return None if the whole frame has to be sent, which means there is no
+    previous frame or the number of rows has changed.
+    """
+    if previous is None or len(previous) != len(lines):
+        return None
+    return [(i, line) for i, (old, line) in enumerate(zip(previous, lines)) if old != line]
+
+
+def apply_delta(lines: List[str], delta: List[Tuple[int, str]]) -> List[str]:
+    """Apply the delta from `frame_delta` to a copy of lines."""
+    lines = list(lines)
+    for i, line in delta:
+        lines[i] = line
+    return lines
+
+
+class Recorder:
+    """
+    # Record a play session
+    It writes the keys pressed and the frames shown to a compact binary file.
+    Only the rows changed since the last frame are written, and a full frame
+    (keyframe) is written every `keyframe_interval` frames. The data is compressed
+    and written to the file as it goes, so the memory used does not grow with the
+    lenth of the session.
+
+    ```python
+    keyboard = Keyboard()
+    keyboard.start_monitor()
+    with Recorder("session.cmdr") as recorder:
+        keyboard.recorder = recorder
+        while keyboard.KEY != 'q':
+            lines = draw()
+            recorder.frame(lines)
+        keyboard.recorder = None  # Stop recording before the file is closed
+    ```
+
+    Keys recorded after `close` are ignored, because the keyboard thread may still
+    press a key after the recorder is closed. Recording a frame after `close` raises.
+    """
+
+    def __init__(self, file: str, keyframe_interval: int=300, clock: Callable[[], float]=time.time) -> None:
+        """
+        - file:
+            The path to the record file, it will be overwritten.
+
+        - keyframe_interval:
+            How many frames between two full frames. Default is 300.
+
+        - clock:
+            Should be the same as the clock of `Keyboard`. Default is time.time
+        """
+        if keyframe_interval <= 0:
+            raise ValueError("keyframe_interval should be positive.")
+        self.__file = open(file, "wb")
+        self.__file.write(MAGIC + bytes([VERSION]))
+        self.__compressor = zlib.compressobj()
+        self.__keyframe_interval = keyframe_interval
+        self.__clock = clock
+        self.__last_time = clock()
+        self.__previous = None
+        self.__frames = 0
+        self.__lock = threading.Lock()  # Keys are recorded by the keyboard thread
+
+    @property
+    def frames(self):
+        return self.__frames
+
+    def __write(self, kind: bytes, timestamp: float | None, payload: bytes) -> None:
+        if timestamp is None:
+            timestamp = self.__clock()
+        micros = min(max(int((timestamp - self.__last_time) * 1e6), 0), 0xFFFFFFFF)
+        self.__last_time = max(timestamp, self.__last_time)
+        self.__file.write(self.__compressor.compress(_HEAD.pack(kind, micros) + payload))
+
+    def key(self, key: str, trigger_time: float | None=None) -> None:
+        """Record a key, it is called by `Keyboard` if the recorder is set."""
+        data = key.encode("utf-8")
+        with self.__lock:
+            if self.__file.closed:
+                return
+            self.__write(KEY, trigger_time, _COUNT.pack(len(data)) + data)
+
+    def frame(self, lines: List[str], timestamp: float | None=None) -> None:
+        """Record a frame, lines is the list of rows shown on the screen."""
+        with self.__lock:
+            if self.__file.closed:
+                raise Exception("The recorder has been closed.")
+            delta = None
+            if self.__frames % self.__keyframe_interval:
+                delta = frame_delta(self.__previous, lines)
+            if delta is None:
+                payload = [_COUNT.pack(len(lines))]
+                for line in lines:
+                    data = line.encode("utf-8")
+                    payload += [_LINE.pack(len(data)), data]
+                self.__write(KEYFRAME, timestamp, b"".join(payload))
+                # Make sure everything before the keyframe can be read even if the game crashed
+                self.__file.write(self.__compressor.flush(zlib.Z_SYNC_FLUSH))
+            else:
+                payload = [_COUNT.pack(len(delta))]
+                for i, line in delta:
+                    data = line.encode("utf-8")
+                    payload += [_ROW.pack(i, len(data)), data]
+                self.__write(DELTA, timestamp, b"".join(payload))
+            self.__previous = list(lines)
+            self.__frames += 1
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__file.closed:
+                return
+            self.__file.write(self.__compressor.flush())
+            self.__file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_records(file: str, chunk_size: int=1 << 16) -> Iterator[Tuple[bytes, float, Any]]:
+    """
+    Read the records of a record file one by one, the file is read in chunks.
+    Yield (kind, timestamp, data), timestamp is the seconds since the record started.
+    data is the key for KEY, the lines for KEYFRAME and the (index, line) list for DELTA.
+    If the file is cut off, for example the game crashed, it stops at the last complete record.
+    """
+    with open(file, "rb") as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise Exception("This is not a record file.")
+        version = stream.read(1)
+        if not version or version[0] != VERSION:
+            raise Exception("The version of the record file is not supported.")
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        offset = 0
+        timestamp = 0.0
+
+        def take(size):
+            nonlocal offset
+            while len(buffer) - offset < size:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    raise EOFError
+                buffer.extend(decompressor.decompress(chunk))
+            data = bytes(buffer[offset:offset+size])
+            offset += size
+            return data
+
+        while True:
+            if offset > chunk_size:
+                # Drop the records that have been read
+                del buffer[:offset]
+                offset = 0
+            try:
+                kind, micros = _HEAD.unpack(take(_HEAD.size))
+                count, = _COUNT.unpack(take(_COUNT.size))
+                if kind == KEY:
+                    data = take(count).decode("utf-8")
+                elif kind == KEYFRAME:
+                    data = []
+                    for _ in range(count):
+                        lenth, = _LINE.unpack(take(_LINE.size))
+                        data.append(take(lenth).decode("utf-8"))
+                elif kind == DELTA:
+                    data = []
+                    for _ in range(count):
+                        i, lenth = _ROW.unpack(take(_ROW.size))
+                        data.append((i, take(lenth).decode("utf-8")))
+                else:
+                    raise Exception(f"Unknown record {kind!r}, the file might be broken.")
+            except EOFError:
+                return  # The last record is incomplete
+            timestamp += micros / 1e6
+            yield kind, timestamp, data
+
+
+class ReplayBackend:
+    """A fake keyboard backend that works like msvcrt, the keys are fed by `Replayer`."""
+
+    def __init__(self) -> None:
+        self.__keys = deque()
+
+    def feed(self, key: str) -> None:
+        self.__keys.append(key.encode("utf-8"))
+
+    def kbhit(self) -> bool:
+        return bool(self.__keys)
+
+    def getch(self) -> bytes:
+        return self.__keys.popleft()
+
+
+class Replayer:
+    """
+    # Replay a recorded session
+    The keys are fed to `keyboard` through a `ReplayBackend` at the time they were
+    recorded, and the frames are rebuilt and passed to render. Your game should read
+    `replayer.keyboard` instead of the real keyboard while replaying.
+
+    Because every frame and key comes in the recorded order, a record file can also
+    be used as a repeatable workload for benchmark, see the stats returned by `replay`.
+    """
+
+    def __init__(self, file: str) -> None:
+        """
+        - file:
+            The path to the record file.
+        """
+        self.__file = file
+        self.__time = 0.0
+        self.backend = ReplayBackend()
+        self.keyboard = Keyboard(backend=self.backend, clock=lambda: self.__time)
+        self.lines: List[str] | None = None
+
+    @property
+    def time(self):
+        """The recorded time of the current record."""
+        return self.__time
+
+    def replay(self, render: Callable[[List[str]], Any] | None=None, speed: float | None=1.0, step: bool=False, governor=None) -> Dict[str, Any]:
+        """
+        Replay the session.
+
+        - render:
+            Called with the lines of each frame. Default is printing the frame.
+
+        - speed:
+            1.0 means as fast as recorded, 2.0 means twice faster. None or 0 means
+            as fast as possible.
+
+        - step:
+            If True, it will wait for Enter before each frame, speed is ignored.
+
+        - governor:
+            A `governor.QualityGovernor`, it is told the time of each render.
+            Your render should use `governor.quality`.
+
+        Return the stats: frames, keys, elapsed seconds, fps and frame time in ms.
+        If there is a governor, its stats are in "governor".
+        """
+        if render is None:
+            render = lambda lines: print("\n".join(lines), flush=True)
+        frames, keys = 0, 0
+        render_time = 0.0
+        max_render_time = 0.0
+        start = time.perf_counter()
+        for kind, timestamp, data in read_records(self.__file):
+            if speed and not step:
+                delay = timestamp / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.__time = timestamp
+            if kind == KEY:
+                self.backend.feed(data)
+                self.keyboard.poll()
+                keys += 1
+                continue
+            self.lines = data if kind == KEYFRAME else apply_delta(self.lines, data)
+            if step:
+                input()
+            begin = time.perf_counter()
+            render(self.lines)
+            cost = time.perf_counter() - begin
+            render_time += cost
+            max_render_time = max(max_render_time, cost)
+            if governor is not None:
+                governor.frame(cost)
+            frames += 1
+        elapsed = time.perf_counter() - start
+        stats = {
+            "frames": frames,
+            "keys": keys,
+            "elapsed": elapsed,
+            "fps": frames / elapsed if elapsed else 0.0,
+            "mean_frame_ms": render_time / frames * 1e3 if frames else 0.0,
+            "max_frame_ms": max_render_time * 1e3
+        }
+        if governor is not None:
+            stats["governor"] = governor.stats
+        return stats
@@ -1,11 +1,54 @@
 """This script can generate widgets and save it to json files"""
 import os
+import sys
 import json
+import zlib
+import time
+import fnmatch
 import warnings
+from collections import deque
 import cv2
 import numpy as np
 from typing import *
 
+MAPCHAR = "mqpka89045321@#$%^&*()_=||||} "[::-1]  # Default chars ordered by brightness
+
+
+def dump_widgets(full_path: str, data: Dict[str, List[str]], retries: int=50) -> None:
+    """
+    Dump the widgets to widgets.json. It writes a temporary file and replaces
+    widgets.json with it, so a running game never reads a half written file.
+    On Windows widgets.json cannot be replaced while another process is reading it,
+    so it tries again every 20ms for `retries` times.
+    """
+    temp_path = full_path + ".tmp"
+    try:
+        with open(temp_path, 'w', encoding="utf-8") as file:
+            json.dump(data, file)
+        for attempt in range(retries):
+            try:
+                os.replace(temp_path, full_path)
+                break
+            except PermissionError:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(0.02)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def drop_variants(widgets: Dict[str, List[str]], names: Iterable[str]) -> None:
+    """
+    Remove the scaled widgets made from the widgets by `Editor.scale`.
+    It should be called after the widgets changed, because they are out of date.
+    All of names are dropped in one pass, so call it once after changing a lot of widgets.
+    """
+    names = set(names)
+    for key in [key for key in widgets if '@' in key and key.split('@', 1)[0] in names]:
+        widgets.pop(key)
+
 class Generator:
     """
     # Help you quikly generate a widgets
@@ -28,7 +71,7 @@ class Generator:
     You can use method `cmdshow` to see the appearance and size.
     """
 
-    def __init__(self, file: str | None=None, widget_name: str | None=None, *base: None | str, newbase:None | str=None, mapchar: str="mqpka89045321@#$%^&*()_=||||} "[::-1]) -> None:
+    def __init__(self, file: str | None=None, widget_name: str | None=None, *base: None | str, newbase:None | str=None, mapchar: str=MAPCHAR) -> None:
         """
         - file: 
             In where your picture saved.
@@ -70,6 +113,7 @@ class Generator:
         self.__widget_name = widget_name
         self.__string = None
         self.__string_list = None
+        self.__quality = (1.0, None)
         self.resize(fx=58/80, fy=33/92, dsize=None)  # This will rescale the picture to make is show properly in CMD.
 
     @property
@@ -151,7 +195,32 @@ class Generator:
         self.update()
         return self
 
+    def set_quality(self, resize: float=1.0, glyphs: int | None=None) -> Self:
+        """
+        Lower the quality of the widget to make converting faster, for example
+        when a `governor.QualityGovernor` finds the game too slow.
+        It does not change the picture, set it back to 1.0 and None to get the full quality.
+
+        - resize:
+            Scaling ratio applied after `resize`. Default is 1.0
+
+        - glyphs:
+            How many chars of mapchar are used. Default is None, which means all of it.
+        """
+        if resize <= 0:
+            raise ValueError("resize should be positive.")
+        if glyphs is not None and glyphs < 2:
+            raise ValueError("glyphs should be at least 2.")
+        self.__quality = (resize, glyphs)
+        self.update()
+        return self
+
     def update(self):
+        self.__string = self.__convert(*self.__quality)
+        self.__string_list = self.__string.split("\n")
+
+    def __convert(self, resize: float, glyphs: int | None) -> str:
+        """Convert the picture to chars at the quality."""
         if not ((self.__base is None) or (self.__newbase is None)):
             # if both of base and newbase value are set
             mapchar = self.__mapchar
@@ -161,14 +230,19 @@ class Generator:
             # if one of it have not set
             mapchar = self.__mapchar
 
+        im = self.__im
+        if resize != 1.0:
+            im = cv2.resize(im, dsize=None, fx=resize, fy=resize, interpolation=cv2.INTER_AREA)
+        if glyphs is not None and glyphs < len(mapchar):
+            # Keep chars evenly spread over the brightness
+            mapchar = "".join([mapchar[i] for i in np.linspace(0, len(mapchar)-1, glyphs).round().astype(np.int_)])
         mapchar_lenth = len(mapchar)
         mapchar = np.array([ord(i) for i in mapchar], dtype=np.uint8)
-        mapper = (self.__im / 255 * (mapchar_lenth-1)).astype(np.int_)
+        mapper = (im / 255 * (mapchar_lenth-1)).astype(np.int_)
         mapped = mapchar[mapper]  # Map the brightness to chars
         enter_col = np.ones((mapped.shape[0], 1), dtype=np.uint8) * ord('\n')
         mapped = np.concatenate((mapped, enter_col), axis=1)
-        self.__string = mapped.tobytes().decode("utf-8")
-        self.__string_list = self.__string.split("\n")
+        return mapped.tobytes().decode("utf-8")
     
     def cmdshow(self) -> Self:
         """
@@ -200,6 +274,8 @@ class Generator:
             The name of the widget. If the value of widget_name is None,
             it will use the value that you have set previously. If both 
             of it have not been set, then it will raise an exception.
+
+        The widget is always saved at the full quality, even if `set_quality` lowered it.
         """
         if widget_name is not None:
             self.widget_name = widget_name
@@ -216,14 +292,137 @@ class Generator:
                 json.dump({}, file)
         with open(full_path, 'r', encoding="utf-8") as file:
             data = json.load(file)
-            data[self.__widget_name] = self.__string_list
-        with open(full_path, 'w', encoding="utf-8") as file:
-            json.dump(data, file)
+            if self.__quality == (1.0, None):
+                data[self.__widget_name] = self.__string_list
+            else:
+                data[self.__widget_name] = self.__convert(1.0, None).split("\n")
+            drop_variants(data, [self.__widget_name])
+        dump_widgets(full_path, data)
         return self
     
     def __str__(self) -> str:
         return self.__string
 
+class CharGrid:
+    """
+    # Keep a widget as a char array
+    A widget is stored as a list of lines in json, which is slow to edit when the
+    widget is large. This class keeps the widget as a 2d array of unicode code points,
+    so a block of chars can be read or filled by a single array operation.
+
+    Lines of a widget might have different lenth. Cells out of a line are kept as 0
+    and will never be filled.
+
+    Every fill is recorded in the undo log as the block, the fill char and the old
+    values of the changed cells only. If only some cells of the block changed, their
+    int32 index in the block is kept too.
+    """
+
+    def __init__(self, lines: List[str], undo_cells: int=1 << 22) -> None:
+        """
+        - lines:
+            The widget, a list that contains each line of the widget.
+
+        - undo_cells:
+            How many changed cells can be kept in the undo and redo logs.
+            The oldest changes are dropped when there are more. Default is 4M cells.
+        """
+        lengths = [len(line) for line in lines]
+        width = max(lengths, default=0)
+        self.__lengths = np.array(lengths, dtype=np.int_)
+        if all([lenth == width for lenth in lengths]):
+            # A proper widget can be converted at once
+            cells = np.frombuffer("".join(lines).encode("utf-32-le"), dtype="<u4")
+            self.__cells = cells.reshape(len(lines), width).copy()
+        else:
+            self.__cells = np.zeros((len(lines), width), dtype="<u4")
+            for i, line in enumerate(lines):
+                self.__cells[i, :len(line)] = np.frombuffer(line.encode("utf-32-le"), dtype="<u4")
+        self.__undo_cells = undo_cells
+        self.__logged_cells = 0
+        self.__undo_log = deque()
+        self.__redo_log = deque()
+
+    @property
+    def cells(self):
+        return self.__cells
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """(width, height), the same order as `Editor.get_info`"""
+        return self.__cells.shape[1], self.__cells.shape[0]
+
+    def to_lines(self) -> List[str]:
+        """Convert the array back to a list of lines."""
+        return [self.__cells[i, :lenth].tobytes().decode("utf-32-le") for i, lenth in enumerate(self.__lengths)]
+
+    def view(self, top: int, left: int, rows: int, cols: int) -> str:
+        """Get the chars in the given area as a string, only this part will be rendered."""
+        block = self.__cells[top:top+rows, left:left+cols]
+        block = np.where(block == 0, ord(' '), block).astype("<u4")
+        return "\n".join([row.tobytes().decode("utf-32-le") for row in block])
+
+    def fill(self, row0: int, col0: int, row1: int, col1: int, char: str) -> bool:
+        """
+        Fill the block from (row0, col0) to (row1, col1) with char. The end is not included.
+        Return True if any of cells has been changed.
+        """
+        if not (isinstance(char, str) and len(char) == 1):
+            raise TypeError("The char should be a single char.")
+        height, width = self.__cells.shape
+        row0, row1 = max(row0, 0), min(row1, height)
+        col0, col1 = max(col0, 0), min(col1, width)
+        if row0 >= row1 or col0 >= col1:
+            return False
+        block = self.__cells[row0:row1, col0:col1]
+        in_line = np.arange(col0, col1)[None, :] < self.__lengths[row0:row1, None]
+        changed = in_line & (block != ord(char))
+        if changed.all():
+            index = None  # The whole block changed, the old block is enough
+            old = block.copy()
+        else:
+            index = np.flatnonzero(changed).astype(np.int32)
+            if not len(index):
+                return False
+            old = block.reshape(-1)[index] if block.flags.c_contiguous else block[changed]
+        if old.max() < 256:
+            old = old.astype(np.uint8)  # Most of widgets are ascii
+        block[changed] = ord(char)
+        self.__logged_cells -= sum([entry[5].size for entry in self.__redo_log])
+        self.__redo_log.clear()
+        self.__undo_log.append((row0, col0, row1, col1, index, old, char))
+        self.__logged_cells += old.size
+        while self.__logged_cells > self.__undo_cells and len(self.__undo_log) > 1:
+            self.__logged_cells -= self.__undo_log.popleft()[5].size
+        return True
+
+    def __put(self, entry, values) -> None:
+        """Write values to the cells recorded by a log entry."""
+        row0, col0, row1, col1, index = entry[:5]
+        block = self.__cells[row0:row1, col0:col1]
+        if index is None:
+            block[...] = values
+        else:
+            block[np.unravel_index(index, block.shape)] = values
+
+    def undo(self) -> bool:
+        """Undo the last change. Return False if there is nothing to undo."""
+        if not self.__undo_log:
+            return False
+        entry = self.__undo_log.pop()
+        self.__put(entry, entry[5])
+        self.__redo_log.append(entry)
+        return True
+
+    def redo(self) -> bool:
+        """Redo the last undone change. Return False if there is nothing to redo."""
+        if not self.__redo_log:
+            return False
+        entry = self.__redo_log.pop()
+        self.__put(entry, ord(entry[6]))
+        self.__undo_log.append(entry)
+        return True
+
 class Editor:
     """
     # Quikly edit your widgets appearance
@@ -243,6 +442,7 @@ class Editor:
         self.__file_path_is_set = False
         self.__file_path = None
         self.__is_use_editor = None
+        self.__is_script = False
         self.file_path = file_path
         with open(self.__file_path, 'r', encoding="utf-8") as file:
             self.__widgets: Dict[str, List] = json.load(file)
@@ -275,7 +475,9 @@ class Editor:
         return list(self.__widgets.keys())
         
     def __confirm(self):
-        """Will be called while user needs to confirm."""
+        """Will be called while user needs to confirm. Always confirmed in script mode."""
+        if self.__is_script:
+            return True
         while True:
             print("Input Y/n to continue: ", end="")
             char = input()
@@ -295,8 +497,7 @@ class Editor:
         return flag
     
     def save(self) -> Self:
-        with open(self.__file_path, 'w', encoding="utf-8") as file:
-            json.dump(self.__widgets, file)
+        dump_widgets(self.__file_path, self.__widgets)
         return self
     
     def delete(self, *widgets_name) -> Self:
@@ -307,7 +508,8 @@ class Editor:
         if not all(flag_list):
             raise Exception("The widgets you want to delete does not exist.")
         for names in widgets_name:
-            self.__widgets.pop(names)
+            self.__widgets.pop(names, None)  # The same name might be given twice
+        drop_variants(self.__widgets, widgets_name)
         return self
     
     def __cmdshow(self, name):
@@ -341,9 +543,120 @@ class Editor:
             "is_proper": is_proper
         }
     
-    def scale(fx=None, fy=None) -> Self:
-        """Scale your widget"""
-        ...
+    @staticmethod
+    def variant_name(name: str, fx: float, fy: float | None=None, mode: str="nearest", mapchar: str=MAPCHAR) -> str:
+        """
+        The name of a scaled widget, for example `circle@0.5x0.5` for nearest mode,
+        `circle@0.5x0.5+brightness` for brightness mode and `circle@0.5x0.5+brightness.1a2b3c4d`
+        if mapchar is not the default one.
+        """
+        if fy is None:
+            fy = fx
+        variant = f"{name}@{fx:g}x{fy:g}"
+        if mode != "nearest":
+            variant += f"+{mode}"
+            if mapchar != MAPCHAR:
+                variant += f".{zlib.crc32(mapchar.encode('utf-8')):08x}"
+        return variant
+
+    def scale(self, name: str, fx: float, fy: float | None=None, mode: Literal["nearest", "brightness"]="nearest", mapchar: str=MAPCHAR, inplace: bool=False) -> Self:
+        """
+        Scale your widget without going back to the picture.
+
+        - name:
+            The name of the widget, it can be a glob such as `tree_*`.
+
+        - fx, fy:
+            Horizontal and vertical scaling ratio. If fy is None, it will be the same as fx.
+
+        - mode:
+            `nearest` copies the nearest char. `brightness` maps the chars back to
+            brightness through mapchar, resamples the brightness and maps it to chars again,
+            which looks smoother. Chars not in mapchar are always copied from the nearest char.
+
+        - mapchar:
+            Should be the same as the one used by `Generator` to generate the widget.
+
+        - inplace:
+            Default is False, which means the scaled widget will be saved alongside the
+            widget with the name `name@fxxfy`, see `variant_name`. So a game can switch
+            between them without converting the picture again. If it is True, the widget
+            itself will be replaced.
+
+        The scaled widgets are dropped when the widget is changed by `Editor` or `Generator.save`.
+        """
+        if fy is None:
+            fy = fx
+        if fx <= 0 or fy <= 0:
+            raise ValueError("The scaling ratio should be positive.")
+        changed = []
+        for wid in self.select(name):
+            if '@' in wid and wid != name:
+                continue  # Do not scale the scaled widgets matched by a glob
+            scaled = self.__scale(self.__widgets[wid], fx, fy, mode, mapchar)
+            if inplace:
+                self.__widgets[wid] = scaled
+                changed.append(wid)
+            else:
+                self.__widgets[self.variant_name(wid, fx, fy, mode, mapchar)] = scaled
+        if changed:
+            drop_variants(self.__widgets, changed)
+        return self
+
+    def scaled(self, name: str, fx: float, fy: float | None=None, mode: Literal["nearest", "brightness"]="nearest", mapchar: str=MAPCHAR) -> List[str]:
+        """Get the scaled widget, it will be scaled and cached if it has not been scaled yet."""
+        variant = self.variant_name(name, fx, fy, mode, mapchar)
+        if variant not in self.__widgets:
+            self.scale(name, fx, fy, mode, mapchar)
+        return self.__widgets[variant]
+
+    def __scale(self, widget: List[str], fx: float, fy: float, mode: str, mapchar: str) -> List[str]:
+        """Scale a list of lines, the last empty line made by `Generator` is kept."""
+        tail = widget[-1:] == [""]
+        lines = widget[:-1] if tail else widget
+        cells = CharGrid(lines).cells
+        if cells.size == 0:
+            return list(widget)
+        height, width = cells.shape
+        new_height, new_width = max(round(height * fy), 1), max(round(width * fx), 1)
+        # Index of the nearest source cell of each new cell
+        rows = np.minimum(((np.arange(new_height) + 0.5) / fy).astype(np.int_), height - 1)
+        cols = np.minimum(((np.arange(new_width) + 0.5) / fx).astype(np.int_), width - 1)
+        scaled = cells[rows[:, None], cols[None, :]]
+        if mode == "brightness":
+            codes = np.array([ord(char) for char in mapchar], dtype="<u4")
+            chars = np.unique(codes)
+            # A char might appear several times in mapchar, use the mean of its brightness
+            levels = np.array([np.flatnonzero(codes == char).mean() for char in chars])
+            index = np.minimum(np.searchsorted(chars, cells), len(chars) - 1)
+            known = (chars[index] == cells).astype(np.float32)
+            brightness = (levels[index] * known).astype(np.float32)
+            interpolation = cv2.INTER_AREA if fx * fy < 1 else cv2.INTER_LINEAR
+            brightness = cv2.resize(brightness, (new_width, new_height), interpolation=interpolation)
+            weight = cv2.resize(known, (new_width, new_height), interpolation=interpolation)
+            level = np.rint(brightness / np.maximum(weight, 1e-6)).astype(np.int_)
+            mapped = codes[np.clip(level, 0, len(codes) - 1)]
+            nearest_known = known[rows[:, None], cols[None, :]] > 0
+            scaled = np.where(nearest_known, mapped, scaled)
+        elif mode != "nearest":
+            raise ValueError("The mode should be nearest or brightness.")
+        scaled = np.ascontiguousarray(scaled, dtype="<u4")
+        # Cells out of line are 0, they are removed from the end of the lines
+        lines = [row.tobytes().decode("utf-32-le").rstrip("\0") for row in scaled]
+        return lines + [""] if tail else lines
+
+    def select(self, pattern: str) -> List[str]:
+        """
+        Get the names of widgets matched by pattern.
+        The pattern can be a widget name or a glob such as `tree_*` or `enemy?`.
+        """
+        if not any(char in pattern for char in "*?["):
+            return [pattern]
+        # fnmatch.filter ignores case on Windows, widget names are case sensitive
+        names = [name for name in self.__widgets if fnmatch.fnmatchcase(name, pattern)]
+        if not names and self.__is_script:
+            raise Exception(f"No widget matches {pattern}.")
+        return names
 
     def __commands_parse(self, commands: str):
         """This help to parse the commands"""
@@ -366,14 +679,17 @@ class Editor:
 
     See the info of commands below:
     - help: This will show you the commands.
-    - del -<*name>: This will delete the widgets.
+    - del -<*name>: This will delete the widgets. The name can be a glob such as `tree_*`.
     - show -<name>: This will show the widget.
     - edit -<name>: 
         This allows you to enter edit mode, which can edit widget 
         char by char.
-    - replace -<*char> -<char> -<name>: 
-        This will replace all of chars in the first parametors
-        to the char in the second parametors.
+    - scale -<name> -<fx> -<fy>:
+        This will save a scaled widget as `name@fxxfy`. See `scale` method.
+    - replace -<name> -<*char> -<char>: 
+        This will replace all of chars in the second parametors
+        to the char in the third parametors. The name can be a glob.
+        Use /SPC for a space.
     - eval -<code>: 
         This can execute any single-line python code.
         Usually, you can use it to print some information such as shape or something.
@@ -390,22 +706,10 @@ class Editor:
 #### Warnning: 
 If you exit the program without saving it, you will loose all your changes. 
 The options should be ordered as the context above.
+If you have a lot of commands to run, use `cmdscript` instead.
         """
         self.__is_use_editor = use_editor
-        # Map dict
-        map_dict = {
-            "help": self.__help,
-            "del": self.__del,
-            "show": self.__show,
-            "cls": self.__cls,
-            "list": self.__list,
-            "info": self.__info,
-            "edit": self.__edit,
-            "replace": self.__replace,
-            "eval": self.__eval,
-            "save": self.__save,
-            "exit": self.__exit
-        }
+        map_dict = self.__commands_map()
         print("Welcome to CMDEditor, input help to see available commands!")
         while self.__is_use_editor:
             print("Editor.cmdeditor> ", end='')
@@ -425,6 +729,84 @@ The options should be ordered as the context above.
             key, options = self.__commands_parse(commands)
             map_dict[key](*options)
         return self
+
+    def cmdscript(self, file: str | None=None) -> Self:
+        """
+# CMDScript
+    Run the commands of `cmdeditor` from a file or stdin without any confirmation.
+    It is used to edit a lot of widgets at once.
+
+    - file:
+        The path to the script file, one command per line. Empty lines and
+        lines start with '#' are skipped. Default is None, which means the
+        commands will be read from stdin.
+
+    All of edits are applied in memory, `save` commands are ignored and the widgets
+    will be saved only once after the last command. `exit` stops the script early.
+    `show`, `cls` and `edit` are not available in script mode.
+    If a command failed, an exception with its line number will be raised, the widgets
+    will be restored to what they were before the script and nothing will be saved. Widget names can be glob patterns, and a glob that matches nothing
+    is an error. For example:
+    ```
+    replace -tree_* -m q -/SPC
+    del -old_*
+    ```
+        """
+        def stop(*options):
+            self.__is_use_editor = False
+        def refuse(*options):
+            raise Exception("This command is not available in script mode.")
+        map_dict = self.__commands_map()
+        map_dict["save"] = lambda *options: None
+        map_dict["exit"] = stop
+        for key in ("show", "cls", "edit"):
+            map_dict[key] = refuse
+        stream = sys.stdin if file is None else open(file, 'r', encoding="utf-8")
+        # Commands replace the lines of widgets but never change them, so a shallow copy is enough
+        backup = dict(self.__widgets)
+        self.__is_script = True
+        self.__is_use_editor = True
+        try:
+            for lineno, command_input in enumerate(stream, start=1):
+                key, options = self.__commands_parse(command_input)
+                if not key or key.startswith('#'):
+                    continue
+                if key not in map_dict:
+                    raise Exception(f"line {lineno}: command not found: {key}")
+                try:
+                    map_dict[key](*options)
+                except Exception as e:
+                    raise Exception(f"line {lineno}: {command_input.strip()}: {e}") from e
+                if not self.__is_use_editor:
+                    break
+        except BaseException:
+            self.__widgets.clear()
+            self.__widgets.update(backup)
+            raise
+        finally:
+            self.__is_script = False
+            self.__is_use_editor = None
+            if file is not None:
+                stream.close()
+        self.save()
+        return self
+    
+    def __commands_map(self):
+        """Map the commands to the methods"""
+        return {
+            "help": self.__help,
+            "del": self.__del,
+            "show": self.__show,
+            "cls": self.__cls,
+            "list": self.__list,
+            "info": self.__info,
+            "edit": self.__edit,
+            "replace": self.__replace,
+            "scale": self.__scale_command,
+            "eval": self.__eval,
+            "save": self.__save,
+            "exit": self.__exit
+        }
     
     "--------"
     def __help(self, *options):
@@ -434,7 +816,7 @@ The options should be ordered as the context above.
 
     def __del(self, *options):
         name, = options
-        name = name.split(' ')
+        name = [wid for pattern in name.split(' ') for wid in self.select(pattern)]
         wids = " ".join(name)
         print(f"You are going to delete those widgets {wids}.\nThis operation cannot be canceled.")
         if self.__confirm():
@@ -465,27 +847,40 @@ is_proper: \t{result['is_proper']}
 """)
 
     def __edit(self, *options):
-        """Using tkinter to implement"""
+        """Using tkinter to implement, only the visible part of the widget will be rendered."""
         import tkinter as tk
+        import tkinter.font as tkfont
         # Initialize options
         name, = options
         name = name.strip()
-        widget = self.__widgets[name]
-        widget = '\n'.join(widget)
+        grid = CharGrid(self.__widgets[name])
         # Set monitor
         class Mnt:
             def __init__(self) -> None:
                 self.ctrl = None
+                self.shift = None
                 self.mouse_wheel = None
                 self.replacement = None
                 self.font = ["Consolas", 2, "normal"]
+                # Viewport, in cells
+                self.top = 0
+                self.left = 0
+                self.rows = 1
+                self.cols = 1
+                # Block selection, (row, col) of the cells
+                self.anchor = None
+                self.cursor = None
             
             def on_key_press(self, event: tk.Event):
                 if event.keysym == "Control_L":
                     self.ctrl = True
+                elif event.keysym in ("Shift_L", "Shift_R"):
+                    self.shift = True
             def on_key_release(self, event: tk.Event):
                 if event.keysym == "Control_L":
                     self.ctrl = False
+                elif event.keysym in ("Shift_L", "Shift_R"):
+                    self.shift = False
             def on_mouse_wheel(self, event: tk.Event):
                 if self.ctrl:
                     if event.delta > 0:
@@ -496,14 +891,38 @@ is_proper: \t{result['is_proper']}
                         if self.font[1] != 1:
                             self.font[1] -= 1
                             print("editor: [log] scaling...")
-                    cmdshow.config(font=self.font)
+                    font.config(size=self.font[1])
+                    resize_viewport()
+                else:
+                    step = -3 if event.delta > 0 else 3
+                    if self.shift:
+                        scroll(0, step)
+                    else:
+                        scroll(step, 0)
             def undo_action(self, event: tk.Event):
-                try:
-                    cmdshow.edit_undo()
-                    print("editor: [log] redo")
-                except tk.TclError as e:
-                    print(f"editor: [Warning] failed to undo {e}")
-                    pass
+                if grid.undo():
+                    print("editor: [log] undo")
+                    render()
+                else:
+                    print("editor: [Warning] nothing to undo")
+                return "break"
+            def on_select_start(self, event: tk.Event):
+                self.anchor = self.cursor = cell_at(event)
+                cmdshow.focus_set()
+                render_selection()
+                return "break"
+            def on_select_move(self, event: tk.Event):
+                if self.anchor is None:
+                    return "break"
+                self.cursor = cell_at(event)
+                render_selection()
+                return "break"
+            def on_char(self, event: tk.Event):
+                # Typing a char fills the selected block with it
+                if self.ctrl or len(event.char) != 1 or not event.char.isprintable():
+                    return
+                fill(event.char)
+                return "break"
             def replacement_on_focus_in(self, event: tk.Event):
                 replacement.delete(0, tk.END)
             def replacement_on_focus_out(self, event: tk.Event):
@@ -522,61 +941,92 @@ is_proper: \t{result['is_proper']}
                     self.replacement = None
                 else: self.replacement = None
         mnt = Mnt()
+        # Viewport funtions
+        def block():
+            """The selected block as (row0, col0, row1, col1), the end is not included."""
+            if mnt.anchor is None:
+                return None
+            row0, row1 = sorted([mnt.anchor[0], mnt.cursor[0]])
+            col0, col1 = sorted([mnt.anchor[1], mnt.cursor[1]])
+            return row0, col0, row1 + 1, col1 + 1
+        def cell_at(event: tk.Event):
+            line, col = [int(i) for i in cmdshow.index(f"@{event.x},{event.y}").split('.')]
+            width, height = grid.shape
+            row = min(mnt.top + line - 1, height - 1)
+            col = min(mnt.left + col, width - 1)
+            return max(row, 0), max(col, 0)
+        def render_selection():
+            cmdshow.tag_remove("block", "1.0", tk.END)
+            selected = block()
+            if selected is None:
+                return
+            row0, col0, row1, col1 = selected
+            col0, col1 = max(col0 - mnt.left, 0), min(col1 - mnt.left, mnt.cols)
+            if col0 >= col1:
+                return
+            for row in range(max(row0, mnt.top), min(row1, mnt.top + mnt.rows)):
+                line = row - mnt.top + 1
+                cmdshow.tag_add("block", f"{line}.{col0}", f"{line}.{col1}")
+        def render():
+            cmdshow.config(state="normal")
+            cmdshow.delete("1.0", tk.END)
+            cmdshow.insert("1.0", grid.view(mnt.top, mnt.left, mnt.rows, mnt.cols))
+            cmdshow.config(state="disabled")
+            render_selection()
+            width, height = grid.shape
+            yscroll.set(mnt.top / max(height, 1), min((mnt.top + mnt.rows) / max(height, 1), 1))
+            xscroll.set(mnt.left / max(width, 1), min((mnt.left + mnt.cols) / max(width, 1), 1))
+        def scroll(rows, cols):
+            width, height = grid.shape
+            top = min(max(mnt.top + rows, 0), max(height - mnt.rows, 0))
+            left = min(max(mnt.left + cols, 0), max(width - mnt.cols, 0))
+            if (top, left) != (mnt.top, mnt.left):
+                mnt.top, mnt.left = top, left
+                render()
+        def resize_viewport(*args):
+            mnt.rows = max(cmdshow.winfo_height() // max(font.metrics("linespace"), 1), 1)
+            mnt.cols = max(cmdshow.winfo_width() // max(font.measure('m'), 1), 1)
+            scroll(0, 0)
+            render()
+        def scrollbar_command(axis):
+            def command(action, value, unit=None):
+                width, height = grid.shape
+                total, page = (height, mnt.rows) if axis == 0 else (width, mnt.cols)
+                current = mnt.top if axis == 0 else mnt.left
+                if action == "moveto":
+                    step = int(float(value) * total) - current
+                elif unit == "pages":
+                    step = int(value) * page
+                else:
+                    step = int(value)
+                if axis == 0:
+                    scroll(step, 0)
+                else:
+                    scroll(0, step)
+            return command
+        def fill(char):
+            selected = block()
+            if selected is None or char is None:
+                print("editor: [Warning] Nothing selected or no replacement")
+                return
+            if grid.fill(*selected, char):
+                print("editor: [log] Replaced")
+                render()
         # Callback funtions
         def __save(*args):
-            widget = cmdshow.get('1.0', 'end')
-            self.__widgets[name] = widget.split('\n')
+            self.__widgets[name] = grid.to_lines()
+            drop_variants(self.__widgets, [name])
             print("Editor: [log] Saving file")
             self.save()
         def __redo(*args):
-            try:
-                cmdshow.edit_redo()
+            if grid.redo():
                 print("editor: [log] redo")
-            except tk.TclError as e:
-                print(f"editor: [Warning] redo failed {e}")
-                pass
-        def __replace(*args):
-            # Get selected index
-            try:
-                first = cmdshow.index('sel.first')
-                last = cmdshow.index('sel.last')
-                print("editor: [log] Got selected index")
-            except tk.TclError:
-                first, last = None, None
-                print("editor: [Warning] Get index failed")
-            if bool(first) and bool(last):
-                print("editor: [log] parsing index")
-                line0, index0 = [int(i) for i in first.split('.')]
-                line1, index1 = [int(i) for i in last.split('.')]
+                render()
             else:
-                line0, line1, index0, index1 = False, False, False, False
-            # Calculate the chars
-            line_char = self.get_info(name)["shape"][0]
-            if line0 and line1:
-                if line0 == line1:
-                    replacement = mnt.replacement * (index1 - index0)
-                    cmdshow.replace(first, last, replacement)
-                # first line
-                elif line1 > line0:
-                    # first line
-                    a = first
-                    b = '.'.join([f"{line0}", f"{line_char}"])
-                    replacement = mnt.replacement * (line_char-index0)
-                    cmdshow.replace(a, b, replacement)
-                    # last line
-                    a = '.'.join([f"{line1}", f"0"])
-                    b = '.'.join([f"{line1}", f"{index1}"])
-                    replacement = mnt.replacement * index1
-                    cmdshow.replace(a, b, replacement)
-                    # middle line
-                    for i in range(line0+1, line1):
-                        a = '.'.join([f"{i}", f"0"])
-                        b = '.'.join([f"{i}", f"{line_char}"])
-                        replacement = mnt.replacement * (line_char)
-                        cmdshow.replace(a, b, replacement)
-                else: print("editor: [error] Failed when replacing the string with unkown reason"); pass
-                print("editor: [log] Replaced")
-            else: pass            
+                print("editor: [Warning] nothing to redo")
+            return "break"
+        def __replace(*args):
+            fill(mnt.replacement)
 
         # Set root
         root = tk.Tk()
@@ -586,7 +1036,9 @@ is_proper: \t{result['is_proper']}
         root.bind('<KeyRelease>', mnt.on_key_release)
         root.bind('<MouseWheel>', mnt.on_mouse_wheel)
         root.bind('<Control-z>', mnt.undo_action)
+        root.bind('<Control-y>', __redo)
         root.bind('<Control-s>', __save)
+        font = tkfont.Font(root, family=mnt.font[0], size=mnt.font[1], weight=mnt.font[2])
         # Set Buttons]
         redo = tk.Button(root)
         redo.config(background="white", foreground="black", text="redo", command=__redo)
@@ -602,11 +1054,21 @@ is_proper: \t{result['is_proper']}
         replacement.grid(row=0, column=3, sticky="nsew")
         replacement.bind("<FocusIn>", mnt.replacement_on_focus_in)
         replacement.bind("<FocusOut>", mnt.replacement_on_focus_out)
-        # Set Text
+        # Set Text, it only shows the viewport and it is edited through the grid.
+        # It is disabled so that Tk will not edit it by itself.
         cmdshow = tk.Text(root)
-        cmdshow.insert(tk.END, widget)
-        cmdshow.config(foreground="white", font=mnt.font, background="black", undo=True)
+        cmdshow.config(foreground="white", font=font, background="black", wrap="none", undo=False, cursor="crosshair")
+        cmdshow.tag_config("block", background="#264f78")
         cmdshow.grid(row=1, column=0, columnspan=4, sticky="nsew")
+        cmdshow.bind("<Button-1>", mnt.on_select_start)
+        cmdshow.bind("<B1-Motion>", mnt.on_select_move)
+        cmdshow.bind("<Key>", mnt.on_char)
+        cmdshow.bind("<Configure>", resize_viewport)
+        cmdshow.bind("<Control-z>", mnt.undo_action)
+        yscroll = tk.Scrollbar(root, orient=tk.VERTICAL, command=scrollbar_command(0))
+        yscroll.grid(row=1, column=4, sticky="ns")
+        xscroll = tk.Scrollbar(root, orient=tk.HORIZONTAL, command=scrollbar_command(1))
+        xscroll.grid(row=2, column=0, columnspan=4, sticky="ew")
         # Start the mainloop
         root.columnconfigure(0, weight=2)
         root.columnconfigure(1, weight=2)
@@ -620,19 +1082,30 @@ is_proper: \t{result['is_proper']}
     
     def __replace(self, *options):
         name, chars, newchar = options
-        chars = chars.split(' ')
+        chars = [char for char in chars.split(' ') if char]
         for i, char in enumerate(chars):
             if char == "/SPC":
                 chars[i] = ' '
+            elif len(char) != 1:
+                raise Exception(f"'{char}' is not a single char, separate the chars by space and use /SPC for space.")
+        if not chars:
+            raise Exception("There is no char to replace.")
         if newchar == "/SPC":
             newchar = ' '
-        widget = "\n".join(self.widgets[name])
+        names = self.select(name)
         print("This will replace all of chars to new char.")
         if self.__confirm():
-            for char in chars:
-                widget = widget.replace(char, newchar)
-        self.__widgets[name] = widget.split('\n')
+            table = str.maketrans({char: newchar for char in chars})  # Replace all of chars in one pass
+            for name in names:
+                self.__widgets[name] = [line.translate(table) for line in self.__widgets[name]]
+            drop_variants(self.__widgets, names)
      
+    def __scale_command(self, *options):
+        name, fx, fy = options
+        fx, fy = float(fx), float(fy)
+        self.scale(name, fx, fy)
+        print(f"Scaled widgets are saved with the suffix {self.variant_name('', fx, fy)}.")
+
     def __eval(self, *options):
         code, = options
         eval(code)